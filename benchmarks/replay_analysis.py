@@ -0,0 +1,103 @@
+#!/usr/bin/env python3
+"""
+Benchmark/profiling de análises completas de URL sem rede (modo replay)
+
+Reproduz páginas e respostas da API Perplexity gravadas com
+TRANSPORT_MODE=record e mede o tempo de cada analyze_url. O
+armazenamento de resultados usa um diretório temporário com TTL zero e
+os caches de encurtadores e de saúde de domínios são recriados a cada
+iteração, para que toda iteração execute a análise completa. Termina com
+erro se alguma requisição não estiver gravada.
+
+Uso:
+    TRANSPORT_MODE=record TRANSPORT_ARCHIVE=archive.sqlite3 python web_app.py
+    python benchmarks/replay_analysis.py archive.sqlite3 [--iterations 5] [--latency 0] [--profile]
+"""
+
+import argparse
+import cProfile
+import os
+import pstats
+import statistics
+import sys
+import tempfile
+import time
+
+
+def parse_args():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument('archive', help='arquivo gravado com TRANSPORT_MODE=record')
+    parser.add_argument('--urls', help='arquivo com uma URL por linha (padrão: todas as URLs GET gravadas)')
+    parser.add_argument('--iterations', type=int, default=5)
+    parser.add_argument('--latency', default='recorded',
+                        help="'recorded' (padrão) ou latência fixa em segundos por requisição")
+    parser.add_argument('--profile', action='store_true', help='exibir perfil cProfile das análises')
+    parser.add_argument('--top', type=int, default=25, help='funções exibidas no perfil')
+    return parser.parse_args()
+
+
+def main():
+    args = parse_args()
+    if not os.path.exists(args.archive):
+        sys.exit(f"Arquivo não encontrado: {args.archive}")
+
+    # Configurar o ambiente antes de importar o app
+    os.environ['TRANSPORT_MODE'] = 'replay'
+    os.environ['TRANSPORT_ARCHIVE'] = args.archive
+    os.environ['REPLAY_LATENCY'] = args.latency
+    os.environ['RESULT_STORE_DIR'] = tempfile.mkdtemp(prefix='replay-results-')
+    os.environ['RESULT_CACHE_TTL'] = '0'
+    os.environ['PREFETCH_FEEDS'] = ''
+    os.environ.setdefault('PERPLEXITY_API_KEY', 'replay')
+
+    sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+    import logging
+    from web_app import DomainHealthTracker, URLCanonicalizer, analyzer
+    logging.disable(logging.WARNING)
+
+    if args.urls:
+        with open(args.urls) as urls_file:
+            urls = [line.strip() for line in urls_file if line.strip()]
+    else:
+        urls = analyzer.transport.archive.urls('GET')
+    if not urls:
+        sys.exit("Nenhuma URL para analisar")
+
+    profiler = cProfile.Profile() if args.profile else None
+    durations = []
+    statuses = {}
+    for _ in range(args.iterations):
+        # Cada iteração parte do mesmo estado: o cache de encurtadores faria a
+        # URL final (não gravada) ser buscada e o cache negativo de domínios
+        # serviria erros guardados em vez de executar a análise
+        analyzer.url_canonicalizer = URLCanonicalizer()
+        analyzer.domain_health = DomainHealthTracker(analyzer.timeout)
+        for url in urls:
+            start = time.perf_counter()
+            if profiler:
+                profiler.enable()
+            result = analyzer.analyze_url(url)
+            if profiler:
+                profiler.disable()
+            durations.append(time.perf_counter() - start)
+            statuses[result.get('status')] = statuses.get(result.get('status'), 0) + 1
+
+    durations.sort()
+    p95 = durations[min(len(durations) - 1, int(len(durations) * 0.95))]
+    print(f"{len(urls)} URL(s) x {args.iterations} iteração(ões), latência: {args.latency}")
+    print(f"análises: {len(durations)}  status: {statuses}")
+    print(f"tempo/análise (ms): média {statistics.mean(durations) * 1000:.2f}  "
+          f"p50 {statistics.median(durations) * 1000:.2f}  p95 {p95 * 1000:.2f}  "
+          f"máx {durations[-1] * 1000:.2f}")
+    print(f"transporte: {analyzer.transport.stats()}")
+    if analyzer.transport.misses:
+        sys.exit(f"{analyzer.transport.misses} requisição(ões) ausente(s) do arquivo de replay; "
+                 f"os tempos acima não são comparáveis (grave novamente com TRANSPORT_MODE=record)")
+
+    if profiler:
+        print()
+        pstats.Stats(profiler).sort_stats('cumulative').print_stats(args.top)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,154 @@
+#!/usr/bin/env python3
+"""
+Microbenchmark do pipeline de entrada de texto (sem chamada à API)
+
+Compara o pipeline anterior (duas passadas de regex na rota, métricas
+recalculadas em analyze_text/_analyze_text_quality) com o NewsDocument,
+medindo tempo de CPU e alocações por requisição em textos de 20k caracteres.
+
+Uso:
+    python benchmarks/text_pipeline.py [--iterations 200] [--size 20000]
+"""
+
+import argparse
+import os
+import random
+import re
+import sys
+import time
+import tracemalloc
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from web_app import NewsDocument, analyzer, sanitize_input  # noqa: E402
+
+
+def legacy_sanitize_input(text, max_length=50000):
+    """sanitize_input anterior (duas passadas de regex)"""
+    if not text:
+        return ""
+    text = text[:max_length]
+    text = re.sub(r'[<>"\']', '', text)
+    text = re.sub(r'[\x00-\x1f\x7f-\x9f]', '', text)
+    return text.strip()
+
+
+def legacy_text_quality(text):
+    """Métricas de _analyze_text_quality anteriores"""
+    words = text.split()
+    sentences = text.split('.')
+    avg_word_length = sum(len(word) for word in words) / len(words) if words else 0
+    avg_sentence_length = sum(len(sentence.split()) for sentence in sentences) / len(sentences) if sentences else 0
+    uppercase_ratio = sum(1 for c in text if c.isupper()) / len(text) if text else 0
+    return {
+        'avg_word_length': round(avg_word_length, 2),
+        'avg_sentence_length': round(avg_sentence_length, 2),
+        'uppercase_ratio': round(uppercase_ratio * 100, 2),
+        'word_count': len(words),
+        'sentence_count': len([s for s in sentences if s.strip()])
+    }
+
+
+def legacy_pipeline(raw_text):
+    """Rota + analyze_text anteriores, sem a consulta à API"""
+    text = legacy_sanitize_input(raw_text, max_length=50000)
+    if len(text) < 50 or len(text) > 20000:
+        return None
+    if len(text) < 50 or len(text) > 20000:
+        return None
+    query_excerpt = text[:1500]
+    text_analysis = legacy_text_quality(text)
+    return {
+        'text_data': {
+            'content': text[:500] + "..." if len(text) > 500 else text,
+            'length': len(text),
+            'word_count': len(text.split()),
+        },
+        'text_analysis': text_analysis,
+        'query_excerpt': query_excerpt,
+    }
+
+
+def document_pipeline(raw_text):
+    """Rota + analyze_text atuais com NewsDocument, sem a consulta à API"""
+    text = sanitize_input(raw_text, max_length=50000)
+    if len(text) < 50 or len(text) > 20000:
+        return None
+    document = NewsDocument(text)
+    query_excerpt = document.text[:1500]
+    text_analysis = analyzer._analyze_text_quality(document)
+    return {
+        'text_data': {
+            'content': document.preview(500),
+            'length': document.length,
+            'word_count': document.word_count,
+        },
+        'text_analysis': text_analysis,
+        'query_excerpt': query_excerpt,
+    }
+
+
+def make_text(size, seed=42):
+    """Texto de notícia sintético com pontuação, aspas e caracteres de controle"""
+    rng = random.Random(seed)
+    vocabulary = [
+        'governo', 'anunciou', 'nesta', 'segunda-feira', 'URGENTE', 'fontes',
+        'afirmam', 'que', 'o', '"plano"', 'será', 'votado', '<b>', 'Brasília',
+        'economia', 'cresceu', '3,5%', 'segundo', 'IBGE', "d'água", '\t', '\r\n'
+    ]
+    parts = []
+    length = 0
+    while length < size:
+        word = rng.choice(vocabulary)
+        if rng.random() < 0.08:
+            word += '.'
+        parts.append(word)
+        length += len(word) + 1
+    return ' '.join(parts)[:size]
+
+
+def measure(pipeline, text, iterations):
+    """Tempo de CPU médio e pico de memória alocada por chamada"""
+    pipeline(text)  # aquecimento
+
+    start = time.process_time()
+    for _ in range(iterations):
+        pipeline(text)
+    cpu_per_call = (time.process_time() - start) / iterations
+
+    tracemalloc.start()
+    pipeline(text)
+    _, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+
+    return cpu_per_call, peak
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument('--iterations', type=int, default=200)
+    parser.add_argument('--size', type=int, default=20000)
+    args = parser.parse_args()
+
+    text = make_text(args.size)
+    legacy, current = legacy_pipeline(text), document_pipeline(text)
+    if legacy['text_data'] != current['text_data'] or any(
+        legacy['text_analysis'][key] != current['text_analysis'][key]
+        for key in legacy['text_analysis']
+    ):
+        sys.exit("Resultados divergentes entre os pipelines")
+
+    print(f"Entrada: {len(text)} caracteres, {args.iterations} iterações\n")
+    print(f"{'pipeline':<12}{'CPU/req (ms)':>14}{'pico (KiB)':>14}")
+    results = {}
+    for name, pipeline in (('anterior', legacy_pipeline), ('documento', document_pipeline)):
+        cpu, peak = measure(pipeline, text, args.iterations)
+        results[name] = (cpu, peak)
+        print(f"{name:<12}{cpu * 1000:>14.3f}{peak / 1024:>14.1f}")
+
+    (legacy_cpu, legacy_peak), (cpu, peak) = results['anterior'], results['documento']
+    print(f"\nGanho de CPU: {legacy_cpu / cpu:.2f}x, pico de memória: {peak / legacy_peak:.0%} do anterior")
+
+
+if __name__ == '__main__':
+    main()
@@ -9,7 +9,7 @@ timeout = 30
 keepalive = 5
 max_requests = 1000
 max_requests_jitter = 100
-preload_app = True
+preload_app = True  # also shares the in-flight request counter used by the prefetcher
 user = None
 group = None
 tmp_upload_dir = None
@@ -61,4 +61,11 @@ secure_scheme_headers = {
 # Restart=always
 # 
 # [Install]
-# WantedBy=multi-user.target
\ No newline at end of file
+# WantedBy=multi-user.target
+
+## Background feed pre-analysis
+# Started after fork (threads do not survive preload_app forking); a file
+# lock ensures only one worker runs it. Configure PREFETCH_FEEDS to enable.
+def post_fork(server, worker):
+    from web_app import start_prefetcher
+    start_prefetcher()
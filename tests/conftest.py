@@ -0,0 +1,10 @@
+import os
+import sys
+import tempfile
+
+# Isolar arquivos gerados pelo app (log, resultados) antes de importar web_app
+os.chdir(tempfile.mkdtemp(prefix='fake-news-tests-'))
+os.environ.setdefault('RESULT_STORE_DIR', os.path.join(os.getcwd(), 'results'))
+os.environ.setdefault('TRANSPORT_MODE', 'live')
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
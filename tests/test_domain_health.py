@@ -0,0 +1,109 @@
+import requests
+
+from web_app import DomainHealthTracker, NewsAnalyzer
+
+
+class TimeoutAfterRedirect:
+    """Transporte de teste: o encurtador redireciona e o destino expira"""
+
+    def get(self, url, **kwargs):
+        request = requests.Request('GET', 'https://dead-site.example/story').prepare()
+        raise requests.exceptions.Timeout('timeout', request=request)
+
+
+class RedirectToWww:
+    """Transporte de teste: o apex redireciona para www, que responde ou expira"""
+
+    def __init__(self, fail=False):
+        self.fail = fail
+
+    def get(self, url, **kwargs):
+        final_url = url.replace('://example.com', '://www.example.com')
+        if self.fail:
+            request = requests.Request('GET', final_url).prepare()
+            raise requests.exceptions.Timeout('timeout', request=request)
+        response = requests.models.Response()
+        response.status_code = 200
+        response._content = b'<html><body><article>' + b'texto da noticia ' * 20 + b'</article></body></html>'
+        response.url = final_url
+        return response
+
+
+def test_shortener_target_failure_does_not_block_shortener():
+    analyzer = NewsAnalyzer()
+    analyzer.domain_health.failure_threshold = 1
+    analyzer.transport = TimeoutAfterRedirect()
+
+    first = analyzer.extract_content_from_url('https://bit.ly/aaa')
+    assert first['status'] == 'error' and 'cached' not in first
+
+    assert analyzer.domain_health.check('bit.ly', 'https://bit.ly/bbb') is None
+    assert analyzer.domain_health.check('dead-site.example', 'https://dead-site.example/other')
+
+
+def test_submitted_host_shares_health_of_redirect_target():
+    analyzer = NewsAnalyzer()
+    analyzer.domain_health.failure_threshold = 2
+    analyzer.transport = RedirectToWww(fail=True)
+    analyzer.extract_content_from_url('https://example.com/a')
+    analyzer.extract_content_from_url('https://example.com/b')
+
+    cached = analyzer.extract_content_from_url('https://example.com/c')
+    assert cached.get('cached') is True
+    assert analyzer.domain_health.check('www.example.com', 'https://www.example.com/c')
+
+
+def test_submitted_host_gets_adaptive_timeout_samples():
+    analyzer = NewsAnalyzer()
+    analyzer.transport = RedirectToWww()
+    for n in range(analyzer.domain_health.min_samples):
+        assert analyzer.extract_content_from_url(f'https://example.com/{n}')['status'] == 'success'
+    assert analyzer.domain_health.timeout_for('example.com') == analyzer.domain_health.min_timeout
+
+
+def test_single_timeout_only_blocks_that_url():
+    tracker = DomainHealthTracker(30)
+    error = {'error': 'timeout', 'status': 'error'}
+    tracker.record_failure('example.com', 'https://example.com/slow', error)
+    assert tracker.check('example.com', 'https://example.com/slow')
+    assert tracker.check('example.com', 'https://example.com/other') is None
+
+    for n in range(tracker.failure_threshold - 1):
+        tracker.record_failure('example.com', f'https://example.com/slow{n}', error)
+    assert tracker.check('example.com', 'https://example.com/other')
+
+
+def test_success_resets_consecutive_failures():
+    tracker = DomainHealthTracker(30)
+    error = {'error': 'timeout', 'status': 'error'}
+    for n in range(tracker.failure_threshold * 2):
+        tracker.record_failure('example.com', f'https://example.com/slow{n}', error)
+        tracker.record_success('example.com', 0.2)
+    assert tracker.check('example.com', 'https://example.com/other') is None
+
+
+def test_page_specific_4xx_is_cached_per_url():
+    tracker = DomainHealthTracker(30)
+    tracker.record_failure('example.com', 'https://example.com/a', {'error': '404', 'status': 'error'}, 404)
+    assert tracker.check('example.com', 'https://example.com/a')
+    assert tracker.check('example.com', 'https://example.com/b') is None
+
+
+def test_adaptive_timeout_is_bounded():
+    tracker = DomainHealthTracker(30)
+    for _ in range(10):
+        tracker.record_success('fast.example', 0.1)
+    assert tracker.timeout_for('fast.example') == tracker.min_timeout
+    assert tracker.timeout_for('unknown.example') == 30
+
+
+def test_tracked_domains_and_urls_are_bounded():
+    tracker = DomainHealthTracker(30)
+    tracker.max_entries = 5
+    for i in range(20):
+        tracker.record_success(f'site{i}.example', 0.2)
+        tracker.record_failure(f'site{i}.example', f'https://site{i}.example/a', {'error': 'x'}, 404)
+    stats = tracker.stats()
+    assert stats['tracked_domains'] == 5
+    assert stats['failed_urls'] == 5
+    assert tracker.check('site19.example', 'https://site19.example/a')
@@ -0,0 +1,86 @@
+import time
+
+import web_app
+
+
+def test_server_is_idle_tracks_requests_across_workers():
+    assert web_app.server_is_idle()
+    with web_app.app.test_request_context('/'):
+        web_app.track_request_start()
+        assert not web_app.server_is_idle()
+        web_app.track_request_end()
+    assert web_app.server_is_idle()
+
+
+def test_stuck_counter_stops_blocking_after_stale_interval():
+    with web_app.active_requests.get_lock():
+        web_app.active_requests.value = 1
+        web_app.last_request_started.value = time.time() - web_app.ACTIVE_REQUESTS_STALE_AFTER - 1
+    try:
+        assert web_app.server_is_idle()
+    finally:
+        with web_app.active_requests.get_lock():
+            web_app.active_requests.value = 0
+
+
+def test_collect_urls_deduplicates_by_canonical_key(tmp_path):
+    feed = tmp_path / 'feed.xml'
+    feed.write_text(
+        '<rss><channel><link>https://site.example/</link>'
+        '<item><link>https://site.example/a?utm_source=rss</link></item>'
+        '<item><link>https://m.site.example/a/</link></item>'
+        '<item><link>https://site.example/b</link></item>'
+        '</channel></rss>'
+    )
+    prefetcher = web_app.FeedPrefetcher(web_app.analyzer)
+    prefetcher.feeds = [str(feed)]
+    assert prefetcher._collect_urls() == [
+        'https://site.example/a?utm_source=rss', 'https://site.example/b'
+    ]
+
+
+class StubAnalyzer:
+    """Analisador de teste: página extraída, mas a consulta à API falha"""
+
+    def __init__(self, analysis_status):
+        self.api_key = 'test'
+        self.analysis_status = analysis_status
+        self.url_canonicalizer = web_app.URLCanonicalizer()
+        self.domain_health = web_app.DomainHealthTracker(30)
+        self.result_store = set()
+        self.calls = []
+
+    def analyze_url(self, url):
+        self.calls.append(url)
+        return {'status': 'success', 'analysis': {'status': self.analysis_status}}
+
+
+def make_feed(tmp_path):
+    feed = tmp_path / 'feed.xml'
+    feed.write_text('<rss><channel><item><link>https://site.example/a</link></item></channel></rss>')
+    return str(feed)
+
+
+def test_failed_api_call_is_an_error_and_retried_later(tmp_path):
+    analyzer = StubAnalyzer('error')
+    prefetcher = web_app.FeedPrefetcher(analyzer)
+    prefetcher.feeds = [make_feed(tmp_path)]
+
+    prefetcher.run_cycle()
+    assert prefetcher.stats_counters['analyzed'] == 0
+    assert prefetcher.stats_counters['errors'] == 1
+    assert prefetcher._collect_urls() == []
+
+    prefetcher._seen['https://site.example/a'] = time.time() - 1
+    assert prefetcher._collect_urls() == ['https://site.example/a']
+
+
+def test_successful_analysis_is_not_repeated(tmp_path):
+    analyzer = StubAnalyzer('success')
+    prefetcher = web_app.FeedPrefetcher(analyzer)
+    prefetcher.feeds = [make_feed(tmp_path)]
+
+    prefetcher.run_cycle()
+    prefetcher.run_cycle()
+    assert analyzer.calls == ['https://site.example/a']
+    assert prefetcher.stats_counters['analyzed'] == 1
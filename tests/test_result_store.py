@@ -0,0 +1,71 @@
+import web_app
+from web_app import ResultStore
+
+
+def make_store(monkeypatch, directory, **env):
+    monkeypatch.setenv('RESULT_STORE_DIR', str(directory))
+    for name, value in env.items():
+        monkeypatch.setenv(name, str(value))
+    return ResultStore()
+
+
+def make_result(n):
+    return {'status': 'success', 'analysis': {'content': f'análise {n}', 'status': 'success'}}
+
+
+def test_put_get_and_load(monkeypatch, tmp_path):
+    store = make_store(monkeypatch, tmp_path)
+    result_id = store.put(make_result(1), 'text', keys={'text:abc'})
+    assert store.get('text:abc')['result_id'] == result_id
+    assert store.load(result_id)['analysis_type'] == 'text'
+    assert store.load('../../etc/passwd') is None
+
+
+def test_limits_apply_across_processes_sharing_the_directory(monkeypatch, tmp_path):
+    env = {'RESULT_CACHE_MAX_ENTRIES': 10, 'RESULT_STORE_SCAN_EVERY': 2}
+    workers = [make_store(monkeypatch, tmp_path, **env) for _ in range(3)]
+    for n in range(60):
+        workers[n % 3].put(make_result(n), 'text')
+    stored = [name for name in tmp_path.iterdir() if name.suffix == '.json']
+    assert len(stored) <= 10 + 3 * 2
+
+
+def test_rewriting_a_result_does_not_count_twice(monkeypatch, tmp_path):
+    store = make_store(monkeypatch, tmp_path, RESULT_STORE_SCAN_EVERY=1)
+    for _ in range(5):
+        store.put(make_result(1), 'text')
+    assert store.stats()['entries'] == 1
+
+
+def test_load_ignores_memory_copy_evicted_by_another_worker(monkeypatch, tmp_path):
+    first = make_store(monkeypatch, tmp_path)
+    second = make_store(monkeypatch, tmp_path)
+    result_id = first.put(make_result(1), 'text')
+    assert first.load(result_id)
+    second._delete(result_id)
+    assert first.load(result_id) is None
+
+
+def test_result_endpoints_send_cache_headers(monkeypatch, tmp_path):
+    store = make_store(monkeypatch, tmp_path)
+    monkeypatch.setattr(web_app.analyzer, 'result_store', store)
+    result_id = store.put(dict(make_result(1), text_data={'content': 'x', 'length': 1, 'word_count': 1}), 'text')
+    client = web_app.app.test_client()
+
+    page = client.get(f'/result/{result_id}')
+    assert page.status_code == 200
+    assert page.headers['Cache-Control'].startswith('public')
+    assert client.get(f'/result/{result_id}', headers={'If-None-Match': page.headers['ETag']}).status_code == 304
+
+    api = client.get(f'/api/result/{result_id}')
+    assert api.json['result_id'] == result_id
+    assert client.get('/api/result/0000000000000000000f').status_code == 404
+
+
+def test_unwritable_directory_does_not_break_startup(monkeypatch, tmp_path):
+    blocker = tmp_path / 'not-a-directory'
+    blocker.write_text('')
+    store = make_store(monkeypatch, blocker / 'results')
+    result_id = store.put(make_result(1), 'text', keys={'text:abc'})
+    assert result_id
+    assert store.get('text:abc') is None
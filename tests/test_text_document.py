@@ -0,0 +1,39 @@
+import pytest
+
+import web_app
+from web_app import NewsDocument, sanitize_input
+
+
+def test_sanitize_removes_markup_and_control_characters():
+    assert sanitize_input('  <b>"Olá"</b>\x00\x85 mundo\x7f  ') == 'bOlá/b mundo'
+    assert sanitize_input('a' * 100, max_length=10) == 'a' * 10
+
+
+def test_document_metrics():
+    document = NewsDocument('URGENTE: Ação do Governo. Fontes afirmam.  ')
+    assert document.length == 43
+    assert document.word_count == 6
+    assert document.uppercase_count == 10
+    assert document.sentence_count == 3
+    assert document.nonblank_sentence_count == 2
+
+
+@pytest.mark.parametrize('size', [10, 20001])
+def test_analyze_text_rejects_length_before_building_document(monkeypatch, size):
+    def fail(self, text):
+        raise AssertionError('métricas calculadas para texto inválido')
+
+    monkeypatch.setattr(NewsDocument, '__init__', fail)
+    result = web_app.analyzer.analyze_text('a' * size)
+    assert result['status'] == 'error'
+
+
+@pytest.mark.parametrize('size', [10, 20001])
+def test_api_rejects_length_before_building_document(monkeypatch, size):
+    def fail(self, text):
+        raise AssertionError('métricas calculadas para texto inválido')
+
+    monkeypatch.setattr(NewsDocument, '__init__', fail)
+    client = web_app.app.test_client()
+    response = client.post('/api/analyze', json={'type': 'text', 'text': 'a' * size})
+    assert response.status_code == 400
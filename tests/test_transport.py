@@ -0,0 +1,153 @@
+import json
+import os
+import subprocess
+import sys
+
+import pytest
+import requests
+
+import web_app
+from web_app import NewsAnalyzer, RecordingTransport, ReplayMissError, ReplayTransport, TransportArchive
+
+BENCHMARK = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))),
+                         'benchmarks', 'replay_analysis.py')
+ARTICLE = (
+    '<html><head><title>Notícia gravada</title></head><body><article>'
+    + '<p>O governo anunciou nesta segunda-feira um novo plano de investimentos. </p>' * 5
+    + '</article></body></html>'
+).encode('utf-8')
+
+
+def make_response(url, body, history=()):
+    response = requests.models.Response()
+    response.status_code = 200
+    response.reason = 'OK'
+    response.headers = requests.structures.CaseInsensitiveDict({'Content-Type': 'text/html; charset=utf-8'})
+    response._content = body
+    response.url = url
+    for step_url in history:
+        step = requests.models.Response()
+        step.url = step_url
+        response.history.append(step)
+    return response
+
+
+def record(archive, url, response):
+    archive.store(TransportArchive.request_key('get', url), 'get', url, 0.0, response=response)
+
+
+@pytest.fixture
+def archive(tmp_path):
+    archive = TransportArchive(str(tmp_path / 'archive.sqlite3'))
+    record(archive, 'https://bit.ly/abc',
+           make_response('https://news.example/story', ARTICLE, history=['https://bit.ly/abc']))
+    return archive
+
+
+def test_replay_round_trip(archive):
+    transport = ReplayTransport(archive, latency='0')
+    response = transport.get('https://bit.ly/abc', timeout=5)
+    assert response.content == ARTICLE
+    assert response.url == 'https://news.example/story'
+    assert [step.url for step in response.history] == ['https://bit.ly/abc']
+    assert transport.stats()['hits'] == 1
+
+
+def make_completion():
+    response = requests.models.Response()
+    response.status_code = 200
+    response.reason = 'OK'
+    response.headers = requests.structures.CaseInsensitiveDict({'Content-Type': 'application/json'})
+    response._content = json.dumps({
+        'choices': [{'message': {'content': 'Fonte confiável, sem sinais de desinformação.'}}],
+        'citations': ['https://fonte.example/1']
+    }).encode('utf-8')
+    response.url = 'https://api.perplexity.ai/chat/completions'
+    return response
+
+
+def make_analyzer(monkeypatch, tmp_path, transport):
+    monkeypatch.setenv('RESULT_STORE_DIR', str(tmp_path))
+    analyzer = NewsAnalyzer()
+    analyzer.api_key = 'test'
+    analyzer.transport = transport
+    return analyzer
+
+
+def test_record_then_replay_page_and_chat_completion(monkeypatch, tmp_path):
+    archive = TransportArchive(str(tmp_path / 'recorded.sqlite3'))
+    sent = []
+
+    def fake_get(url, **kwargs):
+        sent.append(('GET', url))
+        return make_response('https://news.example/story', ARTICLE, history=[url])
+
+    def fake_post(url, **kwargs):
+        sent.append(('POST', url))
+        return make_completion()
+
+    monkeypatch.setattr(web_app.requests, 'get', fake_get)
+    monkeypatch.setattr(web_app.requests, 'post', fake_post)
+    recorder = make_analyzer(monkeypatch, tmp_path / 'record-results', RecordingTransport(archive))
+    recorded = recorder.analyze_url('https://bit.ly/abc')
+    assert recorded['analysis']['status'] == 'success'
+    assert sent == [('GET', 'https://bit.ly/abc'), ('POST', 'https://api.perplexity.ai/chat/completions')]
+    assert archive.count() == 2
+
+    def no_network(url, **kwargs):
+        raise AssertionError(f'requisição real no replay: {url}')
+
+    monkeypatch.setattr(web_app.requests, 'get', no_network)
+    monkeypatch.setattr(web_app.requests, 'post', no_network)
+    transport = ReplayTransport(archive, latency='0')
+    replayer = make_analyzer(monkeypatch, tmp_path / 'replay-results', transport)
+    replayed = replayer.analyze_url('https://bit.ly/abc')
+
+    assert transport.stats()['hits'] == 2 and transport.misses == 0
+    assert replayed['analysis'] == recorded['analysis']
+    assert replayed['content_data'] == recorded['content_data']
+
+
+def test_connection_is_not_reused_after_fork(archive, monkeypatch):
+    parent_connection = archive._connection()
+    assert archive._connection() is parent_connection
+    monkeypatch.setattr(web_app.os, 'getpid', lambda: -1)
+    assert archive._connection() is not parent_connection
+    assert archive.count() == 1
+
+
+def test_replay_miss_does_not_mark_domain_unhealthy(archive):
+    analyzer = NewsAnalyzer()
+    analyzer.transport = ReplayTransport(archive, latency='0')
+
+    with pytest.raises(ReplayMissError):
+        analyzer.transport.get('https://news.example/other')
+
+    result = analyzer.extract_content_from_url('https://news.example/other')
+    assert result['status'] == 'error'
+    assert analyzer.transport.misses == 2
+    assert analyzer.domain_health.check('news.example', 'https://news.example/other') is None
+    assert analyzer.extract_content_from_url('https://bit.ly/abc')['status'] == 'success'
+
+
+def run_benchmark(archive, *args):
+    env = dict(os.environ, PERPLEXITY_API_KEY='')
+    return subprocess.run(
+        [sys.executable, BENCHMARK, archive.path, '--latency', '0', *args],
+        capture_output=True, text=True, env=env, timeout=60
+    )
+
+
+def test_benchmark_replays_every_iteration(archive):
+    completed = run_benchmark(archive, '--iterations', '3')
+    assert completed.returncode == 0, completed.stderr
+    assert "'misses': 0" in completed.stdout
+    assert "'hits': 3" in completed.stdout
+
+
+def test_benchmark_fails_on_missing_requests(archive, tmp_path):
+    urls_file = tmp_path / 'urls.txt'
+    urls_file.write_text('https://news.example/not-recorded\n')
+    completed = run_benchmark(archive, '--urls', str(urls_file), '--iterations', '1')
+    assert completed.returncode != 0
+    assert 'ausente' in completed.stderr
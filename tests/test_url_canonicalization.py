@@ -0,0 +1,99 @@
+import pytest
+from bs4 import BeautifulSoup
+
+import web_app
+from web_app import URLCanonicalizer, canonicalize_url
+
+
+@pytest.mark.parametrize('url, expected', [
+    ('https://Example.com/news/a?utm_source=x&fbclid=1#top', 'https://example.com/news/a'),
+    ('https://example.com/news/a/', 'https://example.com/news/a'),
+    ('http://example.com:80//news//a', 'http://example.com/news/a'),
+    ('https://example.com:8443/a', 'https://example.com:8443/a'),
+    ('https://example.com/a?b=2&a=1', 'https://example.com/a?a=1&b=2'),
+    ('https://m.example.com/a', 'https://example.com/a'),
+    ('https://www.example.com/a', 'https://example.com/a'),
+    ('https://example.com/news/some-story/amp', 'https://example.com/news/some-story'),
+    ('https://example.com/2024/05/story_12/amp/', 'https://example.com/2024/05/story_12'),
+    ('https://www.example.com/news/story.amp.html', 'https://example.com/news/story.html'),
+    ('https://example.com/news/story.amp', 'https://example.com/news/story'),
+    ('https://example.com/', 'https://example.com/'),
+    ('https://example.com/a?ref=home&share=1', 'https://example.com/a?ref=home&share=1'),
+])
+def test_canonicalize_url(url, expected):
+    assert canonicalize_url(url) == expected
+
+
+@pytest.mark.parametrize('url, expected', [
+    ('https://example.com/amp', 'https://example.com/amp'),
+    ('https://example.com/news/amp', 'https://example.com/news/amp'),
+    ('https://example.com/.amp', 'https://example.com/.amp'),
+])
+def test_canonicalize_url_keeps_amp_paths_without_article(url, expected):
+    assert canonicalize_url(url) == expected
+
+
+@pytest.mark.parametrize('variant', [
+    'https://m.bbc.com/news/1', 'https://amp.bbc.com/news/1', 'https://mobile.bbc.com/news/1'
+])
+def test_mobile_and_amp_hosts_share_desktop_key(variant):
+    assert canonicalize_url(variant) == canonicalize_url('https://www.bbc.com/news/1')
+
+
+def test_canonicalize_url_keeps_invalid_url():
+    assert canonicalize_url('not a url') == 'not a url'
+
+
+def test_resolve_returns_submitted_url_when_unknown():
+    canonicalizer = URLCanonicalizer()
+    url = 'https://m.example.com/a?ref=home'
+    assert canonicalizer.resolve(url) == url
+
+
+def test_resolve_returns_cached_shortener_target():
+    canonicalizer = URLCanonicalizer()
+    canonicalizer.remember('https://bit.ly/abc', 'https://www.example.com/story.html?ref=rss')
+    assert canonicalizer.resolve('https://bit.ly/abc?utm_medium=social') == \
+        'https://www.example.com/story.html?ref=rss'
+
+
+def test_remember_ignores_non_shortener_redirects():
+    canonicalizer = URLCanonicalizer()
+    canonicalizer.remember('https://example.com/story', 'https://consent.example.net/?continue=1')
+    assert canonicalizer.resolve('https://example.com/story') == 'https://example.com/story'
+
+
+def find_canonical(html, page_url):
+    soup = BeautifulSoup(html, 'html.parser')
+    return web_app.analyzer._find_canonical_link(soup, page_url)
+
+
+def test_find_canonical_link_same_host():
+    html = '<link rel="canonical" href="/news/a-1/?utm_source=x">'
+    assert find_canonical(html, 'https://example.com/news/a-1/amp') == 'https://example.com/news/a-1'
+
+
+def test_find_canonical_link_ignores_www():
+    html = '<link rel="canonical" href="https://www.example.com/a">'
+    assert find_canonical(html, 'https://example.com/a?x=1') == 'https://example.com/a'
+
+
+@pytest.mark.parametrize('page_url', [
+    'https://m.bbc.com/news/1', 'https://amp.bbc.com/news/1'
+])
+def test_find_canonical_link_bridges_mobile_and_amp_to_www(page_url):
+    html = '<link rel="canonical" href="https://www.bbc.com/news/1">'
+    assert find_canonical(html, page_url) == 'https://bbc.com/news/1'
+
+
+@pytest.mark.parametrize('href, page_url', [
+    ('https://blogspot.com/post', 'https://evil.blogspot.com/post'),
+    ('https://evil.example.com/a', 'https://example.com/a'),
+    ('https://other.com/a', 'https://example.com/a'),
+])
+def test_find_canonical_link_rejects_other_hosts(href, page_url):
+    assert find_canonical(f'<link rel="canonical" href="{href}">', page_url) is None
+
+
+def test_find_canonical_link_missing():
+    assert find_canonical('<title>x</title>', 'https://example.com/a') is None
@@ -9,11 +9,25 @@ import requests
 from dotenv import load_dotenv
 from bs4 import BeautifulSoup
 import re
-from urllib.parse import urlparse
+import json
+import hashlib
+import sqlite3
+import zlib
+from urllib.parse import urlparse, urljoin, parse_qsl, urlencode, urlunparse
 import logging
+import multiprocessing
+import threading
+from collections import deque, OrderedDict
+from xml.etree import ElementTree
 from functools import wraps
+import tempfile
 import time
-from datetime import datetime, timezone
+from datetime import datetime, timezone, timedelta
+
+try:
+    import fcntl
+except ImportError:  # Windows
+    fcntl = None
 
 # Carregar variáveis de ambiente
 load_dotenv()
@@ -35,11 +49,30 @@ app.secret_key = os.getenv('SECRET_KEY', 'dev-key-change-in-production')
 # Configurações de segurança
 app.config['MAX_CONTENT_LENGTH'] = 16 * 1024 * 1024  # 16MB max file size
 
+# Tempo (s) que navegadores/nginx podem manter resultados armazenados em cache
+RESULT_HTTP_MAX_AGE = int(os.getenv("RESULT_HTTP_MAX_AGE", "3600"))
+
 # Rate limiting simples (em produção usar Redis/Memcached)
 request_counts = {}
 RATE_LIMIT_REQUESTS = 100
 RATE_LIMIT_WINDOW = 3600  # 1 hora
 
+# Requisições em andamento em todos os workers (a pré-análise só roda quando
+# ocioso). Memória compartilhada criada antes do fork: com preload_app=True
+# (gunicorn.conf.py) todos os workers veem o mesmo contador.
+active_requests = multiprocessing.Value('i', 0)
+last_request_started = multiprocessing.Value('d', 0.0)
+# Contadores presos por um worker morto no meio de uma requisição deixam de
+# bloquear a pré-análise após este intervalo sem novas requisições
+ACTIVE_REQUESTS_STALE_AFTER = int(os.getenv("ACTIVE_REQUESTS_STALE_AFTER", "120"))
+
+def server_is_idle():
+    """Indica se nenhum worker está atendendo requisições"""
+    with active_requests.get_lock():
+        if active_requests.value <= 0:
+            return True
+        return time.time() - last_request_started.value > ACTIVE_REQUESTS_STALE_AFTER
+
 def rate_limit(f):
     """Decorator para rate limiting básico"""
     @wraps(f)
@@ -63,28 +96,902 @@ def rate_limit(f):
         return f(*args, **kwargs)
     return decorated_function
 
+# Tabela de tradução pré-compilada (bytes): caracteres perigosos (XSS) e de
+# controle ASCII. Em UTF-8 bytes ASCII nunca fazem parte de caracteres
+# multibyte, então podem ser removidos direto com bytes.translate.
+UNSAFE_ASCII_BYTES = b'<>"\'' + bytes(range(0x00, 0x20)) + b'\x7f'
+# Controles C1 (U+0080-U+009F) são codificados como \xc2\x80-\xc2\x9f
+C1_CONTROL_PATTERN = re.compile(rb'\xc2[\x80-\x9f]')
+ASCII_UPPERCASE_BYTES = bytes(range(ord('A'), ord('Z') + 1))
+NON_ASCII_PATTERN = re.compile(r'[^\x00-\x7f]+')
+
 def sanitize_input(text, max_length=50000):
     """Sanitiza entrada do usuário"""
     if not text:
         return ""
     
-    # Limitar tamanho
-    text = text[:max_length]
+    # Limitar tamanho e remover caracteres perigosos/de controle em uma única passada
+    data = text[:max_length].encode('utf-8', 'surrogatepass').translate(None, UNSAFE_ASCII_BYTES)
+    if b'\xc2' in data:
+        data = C1_CONTROL_PATTERN.sub(b'', data)
+    
+    return data.decode('utf-8', 'surrogatepass').strip()
+
+class NewsDocument:
+    """Texto normalizado de uma requisição, com métricas calculadas uma única vez"""
     
-    # Remover caracteres perigosos (XSS prevention)
-    text = re.sub(r'[<>"\']', '', text)
+    __slots__ = (
+        'text', 'length', 'word_count', 'word_chars', 'uppercase_count',
+        'sentence_count', 'sentence_word_total', 'nonblank_sentence_count',
+        'content_hash'
+    )
     
-    # Remover caracteres de controle
-    text = re.sub(r'[\x00-\x1f\x7f-\x9f]', '', text)
+    def __init__(self, text):
+        self.text = text
+        self.length = len(text)
+        encoded = text.encode('utf-8', 'surrogatepass')
+        self.content_hash = hashlib.sha256(encoded).hexdigest()
+        
+        words = text.split()
+        self.word_count = len(words)
+        self.word_chars = sum(map(len, words))
+        del words  # liberar a lista antes de dividir as sentenças (menor pico de memória)
+        
+        # Maiúsculas: ASCII via tabela de bytes, demais caracteres individualmente
+        self.uppercase_count = len(encoded) - len(encoded.translate(None, ASCII_UPPERCASE_BYTES))
+        if len(encoded) != self.length:
+            self.uppercase_count += sum(map(str.isupper, ''.join(NON_ASCII_PATTERN.findall(text))))
+        
+        sentence_word_counts = [len(sentence.split()) for sentence in text.split('.')]
+        self.sentence_count = len(sentence_word_counts)
+        self.sentence_word_total = sum(sentence_word_counts)
+        self.nonblank_sentence_count = self.sentence_count - sentence_word_counts.count(0)
     
-    return text.strip()
+    def preview(self, limit=500):
+        """Trecho inicial do texto para exibição"""
+        return self.text[:limit] + "..." if self.length > limit else self.text
+
+# Encurtadores de URL conhecidos (redirecionam para o artigo real)
+SHORTENER_DOMAINS = [
+    'bit.ly', 'tinyurl.com', 'shortened.com', 't.co', 'goo.gl',
+    'ow.ly', 'is.gd', 'buff.ly', 'rebrand.ly', 'cutt.ly'
+]
+
+# Parâmetros de rastreamento removidos na canonicalização
+TRACKING_PARAM_PREFIXES = ('utm_', 'ga_', 'pk_', 'mtm_')
+TRACKING_PARAMS = {
+    'fbclid', 'gclid', 'dclid', 'msclkid', 'yclid', 'igshid', 'mc_cid',
+    'mc_eid', '_ga', '_gl', 'ref_src', 'ref_url', 'cmpid', 'ocid',
+    'amp', 'outputtype', 'smid'
+}
+
+# Prefixos de host para variantes desktop/móveis/AMP do mesmo site
+SITE_HOST_PREFIXES = ('www.', 'm.', 'mobile.', 'amp.')
+
+# Sufixo AMP no fim do caminho (/.../slug-do-artigo/amp): só é removido quando
+# o segmento anterior parece um artigo (contém dígito, hífen, "_" ou extensão),
+# para que /amp ou /news/amp não colidam com outras páginas
+AMP_PATH_SUFFIX_PATTERN = re.compile(r'(/[^/]*[-_.0-9][^/]*)/amp/?$')
+
+DEFAULT_PORTS = {'http': 80, 'https': 443}
+
+def is_shortener(netloc):
+    """Verifica se o domínio é de um encurtador de URL conhecido"""
+    host = netloc.lower().split(':')[0]
+    return any(host == domain or host.endswith('.' + domain) for domain in SHORTENER_DOMAINS)
+
+def site_host(host):
+    """Host sem prefixo de variante (www., m., mobile., amp.) do mesmo site"""
+    host = host.lower()
+    for prefix in SITE_HOST_PREFIXES:
+        if host.startswith(prefix) and host.count('.') >= 2:
+            return host[len(prefix):]
+    return host
+
+def canonicalize_url(url):
+    """Normaliza uma URL para que variantes equivalentes gerem a mesma chave
+
+    O resultado é apenas uma chave de cache (pode não existir no servidor);
+    as requisições sempre usam a URL enviada ou o destino do redirecionamento.
+    """
+    parsed = urlparse(url.strip())
+    scheme = parsed.scheme.lower()
+    host = (parsed.hostname or '').rstrip('.')
+
+    if not scheme or not host:
+        return url
+
+    # Variantes www/móvel/AMP do mesmo site geram o mesmo host (m.site.com -> site.com)
+    host = site_host(host)
+
+    netloc = host
+    try:
+        port = parsed.port
+    except ValueError:
+        port = None
+    if port and port != DEFAULT_PORTS.get(scheme):
+        netloc = f"{host}:{port}"
+
+    # Normalizar caminho: barras duplicadas, sufixos AMP e barra final
+    path = re.sub(r'/{2,}', '/', parsed.path or '/')
+    path = AMP_PATH_SUFFIX_PATTERN.sub(r'\1', path)
+    path = re.sub(r'(?<=[^/])\.amp(?=(\.html?)?$)', '', path)
+    if len(path) > 1 and path.endswith('/'):
+        path = path.rstrip('/') or '/'
+
+    # Remover parâmetros de rastreamento e ordenar os restantes
+    query_params = [
+        (key, value) for key, value in parse_qsl(parsed.query, keep_blank_values=True)
+        if not key.lower().startswith(TRACKING_PARAM_PREFIXES)
+        and key.lower() not in TRACKING_PARAMS
+    ]
+    query = urlencode(sorted(query_params))
+
+    # Fragmentos nunca chegam ao servidor e são descartados
+    return urlunparse((scheme, netloc, path, '', query, ''))
+
+class URLCanonicalizer:
+    """Mantém cache com TTL do destino de encurtadores de URL"""
+
+    def __init__(self):
+        self.ttl = int(os.getenv("REDIRECT_CACHE_TTL", "86400"))
+        self.max_entries = int(os.getenv("REDIRECT_CACHE_MAX_ENTRIES", "10000"))
+        self._aliases = {}
+        self._lock = threading.Lock()
+
+    def resolve(self, url):
+        """Retorna a URL a buscar: o destino em cache do encurtador ou a própria URL"""
+        source = canonicalize_url(url)
+
+        with self._lock:
+            entry = self._aliases.get(source)
+            if entry is None:
+                return url
+            target, expires_at = entry
+            if expires_at <= time.time():
+                del self._aliases[source]
+                return url
+
+        return target
+
+    def remember(self, source_url, target_url):
+        """Registra o destino (URL real, não canonicalizada) de um encurtador"""
+        if not is_shortener(urlparse(source_url).netloc):
+            return
+        source = canonicalize_url(source_url)
+        if not target_url or source == canonicalize_url(target_url):
+            return
+
+        current_time = time.time()
+        with self._lock:
+            if len(self._aliases) >= self.max_entries:
+                # Limpar entradas expiradas; se não bastar, descartar as mais antigas
+                for key, (_, expires_at) in list(self._aliases.items()):
+                    if expires_at <= current_time:
+                        del self._aliases[key]
+                while len(self._aliases) >= self.max_entries:
+                    del self._aliases[next(iter(self._aliases))]
+            self._aliases[source] = (target_url, current_time + self.ttl)
+
+        logger.info(f"Destino de encurtador registrado: {source} -> {target_url}")
+
+    def stats(self):
+        """Estatísticas do cache de aliases"""
+        with self._lock:
+            return {'entries': len(self._aliases), 'ttl': self.ttl}
+
+class DomainHealthTracker:
+    """Rastreia a saúde de cada domínio: cache negativo de falhas e timeouts adaptativos"""
+
+    # Respostas que indicam bloqueio ou indisponibilidade do site inteiro
+    DOMAIN_WIDE_STATUS_CODES = {403, 429}
+
+    def __init__(self, default_timeout):
+        self.default_timeout = default_timeout
+        self.negative_ttl = int(os.getenv("NEGATIVE_CACHE_TTL", "60"))
+        self.max_negative_ttl = int(os.getenv("NEGATIVE_CACHE_MAX_TTL", "600"))
+        self.min_timeout = float(os.getenv("ADAPTIVE_TIMEOUT_MIN", "5"))
+        self.timeout_percentile = float(os.getenv("ADAPTIVE_TIMEOUT_PERCENTILE", "95"))
+        self.timeout_multiplier = float(os.getenv("ADAPTIVE_TIMEOUT_MULTIPLIER", "2"))
+        self.latency_samples = int(os.getenv("DOMAIN_LATENCY_SAMPLES", "50"))
+        self.min_samples = 5
+        self.max_entries = int(os.getenv("DOMAIN_HEALTH_MAX_ENTRIES", "10000"))
+        # Falhas seguidas antes de bloquear o domínio inteiro (antes disso, só a URL)
+        self.failure_threshold = max(1, int(os.getenv("DOMAIN_FAILURE_THRESHOLD", "3")))
+        self._domains = OrderedDict()
+        self._failed_urls = OrderedDict()
+        self._lock = threading.Lock()
+
+    def _state(self, domain):
+        state = self._domains.get(domain)
+        if state is None:
+            # Descartar os domínios usados há mais tempo quando cheio
+            while len(self._domains) >= self.max_entries:
+                self._domains.popitem(last=False)
+            state = {
+                'latencies': deque(maxlen=self.latency_samples),
+                'consecutive_failures': 0,
+                'failure': None,
+                'failure_expires_at': 0
+            }
+            self._domains[domain] = state
+        else:
+            self._domains.move_to_end(domain)
+        return state
+
+    def check(self, domain, url):
+        """Retorna o erro em cache se o domínio ou a URL falharam recentemente"""
+        current_time = time.time()
+        with self._lock:
+            cached = self._failed_urls.get(url)
+            if cached:
+                if cached[1] > current_time:
+                    return dict(cached[0], retry_after=int(cached[1] - current_time) + 1)
+                del self._failed_urls[url]
+
+            state = self._domains.get(domain)
+            if state and state['failure'] and state['failure_expires_at'] > current_time:
+                return dict(state['failure'],
+                            retry_after=int(state['failure_expires_at'] - current_time) + 1)
+        return None
+
+    def timeout_for(self, domain):
+        """Timeout adaptativo baseado no percentil de latência observado"""
+        with self._lock:
+            state = self._domains.get(domain)
+            latencies = sorted(state['latencies']) if state else []
+
+        if len(latencies) < self.min_samples:
+            return self.default_timeout
+
+        index = min(len(latencies) - 1, int(len(latencies) * self.timeout_percentile / 100))
+        adaptive = latencies[index] * self.timeout_multiplier
+        return max(self.min_timeout, min(self.default_timeout, adaptive))
+
+    def record_success(self, domain, latency):
+        """Registra uma resposta bem-sucedida e sua latência"""
+        with self._lock:
+            state = self._state(domain)
+            state['latencies'].append(latency)
+            state['consecutive_failures'] = 0
+            state['failure'] = None
+            state['failure_expires_at'] = 0
+
+    def _remember_failed_url(self, url, error, current_time):
+        if url not in self._failed_urls and len(self._failed_urls) >= self.max_entries:
+            # Limpar entradas expiradas; se não bastar, descartar as mais antigas
+            for key, (_, expires_at) in list(self._failed_urls.items()):
+                if expires_at <= current_time:
+                    del self._failed_urls[key]
+            while len(self._failed_urls) >= self.max_entries:
+                self._failed_urls.popitem(last=False)
+        self._failed_urls[url] = (error, current_time + self.negative_ttl)
+
+    def record_failure(self, domain, url, error, status_code=None):
+        """Registra uma falha no cache negativo (por domínio ou apenas pela URL)"""
+        current_time = time.time()
+        with self._lock:
+            # Erros 4xx específicos da página (ex.: 404) não derrubam o domínio inteiro
+            if status_code and 400 <= status_code < 500 and status_code not in self.DOMAIN_WIDE_STATUS_CODES:
+                self._remember_failed_url(url, error, current_time)
+                return
+
+            # Timeouts, erros de conexão e 5xx: uma página lenta não derruba o site;
+            # abaixo do limite de falhas seguidas, só a URL entra no cache negativo
+            state = self._state(domain)
+            state['consecutive_failures'] += 1
+            if (state['consecutive_failures'] < self.failure_threshold
+                    and status_code not in self.DOMAIN_WIDE_STATUS_CODES):
+                self._remember_failed_url(url, error, current_time)
+                return
+
+            # Bloqueios (403/429) e falhas seguidas: backoff exponencial por domínio
+            excess_failures = max(0, state['consecutive_failures'] - self.failure_threshold)
+            ttl = min(self.max_negative_ttl, self.negative_ttl * 2 ** excess_failures)
+            state['failure'] = error
+            state['failure_expires_at'] = current_time + ttl
+
+        logger.warning(f"Domínio marcado como indisponível por {ttl}s: {domain}")
+
+    def stats(self):
+        """Resumo da saúde dos domínios rastreados"""
+        current_time = time.time()
+        with self._lock:
+            unhealthy = [
+                domain for domain, state in self._domains.items()
+                if state['failure'] and state['failure_expires_at'] > current_time
+            ]
+            return {
+                'tracked_domains': len(self._domains),
+                'unhealthy_domains': len(unhealthy),
+                'failed_urls': len(self._failed_urls)
+            }
+
+class ResultStore:
+    """Armazena em disco análises bem-sucedidas, identificadas por hash do conteúdo"""
+
+    RESULT_ID_PATTERN = re.compile(r'^[0-9a-f]{20}$')
+
+    def __init__(self):
+        self.directory = os.getenv("RESULT_STORE_DIR", "results")
+        self.ttl = int(os.getenv("RESULT_CACHE_TTL", "86400"))
+        self.max_entries = int(os.getenv("RESULT_CACHE_MAX_ENTRIES", "5000"))
+        self.max_bytes = int(os.getenv("RESULT_STORE_MAX_MB", "200")) * 1024 * 1024
+        self.memory_entries = int(os.getenv("RESULT_MEMORY_ENTRIES", "256"))
+        # O diretório é compartilhado entre workers: o uso real é medido varrendo
+        # o disco a cada N gravações, não por contadores locais do processo
+        self.scan_every = int(os.getenv("RESULT_STORE_SCAN_EVERY", "50"))
+        self._keys_directory = os.path.join(self.directory, 'keys')
+        self._memory = OrderedDict()
+        self._lock = threading.Lock()
+        self._puts_since_scan = 0
+        self._entries, self._bytes = 0, 0
+        try:
+            os.makedirs(self._keys_directory, exist_ok=True)
+        except OSError as e:
+            # Ex.: volume montado sem permissão de escrita; o app sobe sem armazenar resultados
+            logger.error(f"Armazenamento de resultados indisponível em {self.directory}: {str(e)}")
+            return
+        self.evict()
+
+    @staticmethod
+    def compute_id(result):
+        """Hash estável do conteúdo da análise (ignora campos voláteis)"""
+        payload = {k: v for k, v in result.items() if k not in ('timestamp', 'result_id', 'request_type')}
+        serialized = json.dumps(payload, sort_keys=True, ensure_ascii=False, default=str)
+        return hashlib.sha256(serialized.encode('utf-8')).hexdigest()[:20]
+
+    @staticmethod
+    def _key_hash(key):
+        return hashlib.sha256(key.encode('utf-8')).hexdigest()
+
+    def _path(self, result_id, extension):
+        return os.path.join(self.directory, f"{result_id}.{extension}")
+
+    def _write_atomic(self, path, data):
+        """Grava via arquivo temporário para que leitores nunca vejam arquivos parciais"""
+        fd, tmp_path = tempfile.mkstemp(dir=os.path.dirname(path), suffix='.tmp')
+        try:
+            with os.fdopen(fd, 'wb') as tmp_file:
+                tmp_file.write(data)
+            os.replace(tmp_path, path)
+        except Exception:
+            if os.path.exists(tmp_path):
+                os.remove(tmp_path)
+            raise
+        return len(data)
+
+    def put(self, result, analysis_type, keys=()):
+        """Armazena um resultado e associa as chaves (URL canônica, hash do texto) ao seu id"""
+        result_id = self.compute_id(result)
+        result['result_id'] = result_id
+        record = {
+            'id': result_id,
+            'analysis_type': analysis_type,
+            'result': dict(result),
+            'created_at': time.time(),
+            'expires_at': time.time() + self.ttl
+        }
+        data = json.dumps(record, ensure_ascii=False, default=str).encode('utf-8')
+
+        try:
+            self._write_atomic(self._path(result_id, 'json'), data)
+            for key in keys:
+                self._write_atomic(os.path.join(self._keys_directory, self._key_hash(key)),
+                                   result_id.encode('ascii'))
+        except OSError as e:
+            logger.error(f"Erro ao gravar resultado {result_id}: {str(e)}")
+            return result_id
+
+        with self._lock:
+            self._remember(record)
+            self._puts_since_scan += 1
+            needs_scan = self._puts_since_scan >= self.scan_every
+            if needs_scan:
+                self._puts_since_scan = 0
+
+        if needs_scan:
+            self.evict()
+        return result_id
+
+    def _remember(self, record):
+        self._memory[record['id']] = record
+        self._memory.move_to_end(record['id'])
+        while len(self._memory) > self.memory_entries:
+            self._memory.popitem(last=False)
+
+    def load(self, result_id):
+        """Carrega o registro completo (tipo, resultado, datas) pelo id ou None"""
+        if not result_id or not self.RESULT_ID_PATTERN.match(result_id):
+            return None
+
+        with self._lock:
+            record = self._memory.get(result_id)
+        if record is not None and not os.path.exists(self._path(result_id, 'json')):
+            # Removido por outro worker (evicção)
+            with self._lock:
+                self._memory.pop(result_id, None)
+            return None
+        if record is None:
+            try:
+                with open(self._path(result_id, 'json'), 'rb') as record_file:
+                    record = json.loads(record_file.read())
+            except (OSError, ValueError):
+                return None
+            with self._lock:
+                self._remember(record)
+
+        if record['expires_at'] <= time.time():
+            self._delete(result_id)
+            return None
+        return record
+
+    def get(self, key):
+        """Retorna uma cópia do resultado associado à chave ou None"""
+        try:
+            with open(os.path.join(self._keys_directory, self._key_hash(key)), 'rb') as key_file:
+                result_id = key_file.read().decode('ascii').strip()
+        except OSError:
+            return None
+
+        record = self.load(result_id)
+        return dict(record['result']) if record else None
+
+    def __contains__(self, key):
+        return self.get(key) is not None
+
+    def get_rendered(self, result_id, min_mtime=0):
+        """HTML já renderizado do resultado, se existir e não for anterior a min_mtime"""
+        path = self._path(result_id, 'html')
+        try:
+            if os.path.getmtime(path) < min_mtime:
+                return None
+            with open(path, 'rb') as html_file:
+                return html_file.read().decode('utf-8')
+        except OSError:
+            return None
+
+    def put_rendered(self, result_id, html):
+        """Guarda o HTML renderizado para evitar rodar o template novamente"""
+        try:
+            self._write_atomic(self._path(result_id, 'html'), html.encode('utf-8'))
+        except OSError as e:
+            logger.error(f"Erro ao gravar HTML do resultado {result_id}: {str(e)}")
+
+    def _delete(self, result_id):
+        with self._lock:
+            self._memory.pop(result_id, None)
+        for extension in ('json', 'html'):
+            try:
+                os.remove(self._path(result_id, extension))
+            except OSError:
+                pass
+
+    def evict(self):
+        """Remove resultados expirados e, se necessário, os mais antigos até 90% dos limites"""
+        current_time = time.time()
+        records = {}
+        try:
+            with os.scandir(self.directory) as scan:
+                for entry in scan:
+                    if not entry.is_file() or not entry.name.endswith(('.json', '.html')):
+                        continue
+                    result_id, extension = entry.name.rsplit('.', 1)
+                    try:
+                        stat = entry.stat()
+                    except FileNotFoundError:  # removido por outro worker
+                        continue
+                    info = records.setdefault(result_id, {'bytes': 0, 'mtime': stat.st_mtime})
+                    info['bytes'] += stat.st_size
+                    if extension == 'json':
+                        info['mtime'] = stat.st_mtime
+        except OSError as e:
+            logger.error(f"Erro ao varrer o armazenamento de resultados: {str(e)}")
+            return
+
+        entries = len(records)
+        total_bytes = sum(info['bytes'] for info in records.values())
+        target_entries = int(self.max_entries * 0.9)
+        target_bytes = int(self.max_bytes * 0.9)
+        removed = 0
+
+        for result_id, info in sorted(records.items(), key=lambda item: item[1]['mtime']):
+            expired = info['mtime'] + self.ttl <= current_time
+            if not expired and entries <= target_entries and total_bytes <= target_bytes:
+                break
+            self._delete(result_id)
+            entries -= 1
+            total_bytes -= info['bytes']
+            removed += 1
+
+        # Chaves apontando para resultados removidos ou expirados
+        try:
+            with os.scandir(self._keys_directory) as scan:
+                for entry in scan:
+                    if entry.stat().st_mtime + self.ttl <= current_time:
+                        os.remove(entry.path)
+        except OSError:
+            pass
+
+        with self._lock:
+            self._entries, self._bytes = entries, total_bytes
+        if removed:
+            logger.info(f"Armazenamento de resultados: {removed} removido(s), {entries} restante(s)")
+
+    def stats(self):
+        """Estatísticas do armazenamento de resultados (da última varredura do disco)"""
+        with self._lock:
+            return {
+                'entries': self._entries,
+                'bytes': self._bytes,
+                'max_entries': self.max_entries,
+                'max_bytes': self.max_bytes,
+                'ttl': self.ttl
+            }
+
+class FeedPrefetcher:
+    """Pré-analisa em segundo plano URLs de feeds RSS/Atom monitorados"""
+
+    def __init__(self, analyzer):
+        self.analyzer = analyzer
+        self.feeds = [feed.strip() for feed in os.getenv("PREFETCH_FEEDS", "").split(',') if feed.strip()]
+        self.interval = int(os.getenv("PREFETCH_INTERVAL", "600"))
+        self.max_items = int(os.getenv("PREFETCH_MAX_ITEMS_PER_CYCLE", "20"))
+        self.budget = int(os.getenv("PREFETCH_BUDGET_PER_HOUR", "30"))
+        self.idle_wait = float(os.getenv("PREFETCH_IDLE_WAIT", "2"))
+        self.retry_after = int(os.getenv("PREFETCH_RETRY_AFTER", "1800"))
+        self._budget_window = deque()
+        # Chave canônica -> instante a partir do qual a URL pode ser analisada de novo
+        self._seen = OrderedDict()
+        self._stop = threading.Event()
+        self._thread = None
+        self.stats_counters = {'cycles': 0, 'analyzed': 0, 'skipped': 0, 'errors': 0}
+
+    @property
+    def enabled(self):
+        return bool(self.feeds) and bool(self.analyzer.api_key)
+
+    def start(self):
+        """Inicia a thread de pré-análise (daemon)"""
+        if not self.enabled or (self._thread and self._thread.is_alive()):
+            return False
+        self._stop.clear()
+        self._thread = threading.Thread(target=self._run, name='feed-prefetcher', daemon=True)
+        self._thread.start()
+        logger.info(f"Pré-análise de feeds iniciada: {len(self.feeds)} feed(s), intervalo {self.interval}s")
+        return True
+
+    def stop(self):
+        self._stop.set()
+
+    def _run(self):
+        while not self._stop.is_set():
+            try:
+                self.run_cycle()
+            except Exception as e:
+                logger.error(f"Erro inesperado na pré-análise de feeds: {str(e)}")
+            self._stop.wait(self.interval)
+
+    def run_cycle(self):
+        """Lê os feeds e analisa as URLs novas respeitando o orçamento"""
+        self.stats_counters['cycles'] += 1
+        for url in self._collect_urls()[:self.max_items]:
+            if self._stop.is_set():
+                return
+            if not self._consume_budget():
+                logger.info("Orçamento de pré-análise esgotado neste período")
+                return
+            # Prioridade baixa: só usar capacidade ociosa
+            while not server_is_idle() and not self._stop.is_set():
+                self._stop.wait(self.idle_wait)
+
+            result = self.analyzer.analyze_url(url)
+            # analyze_url retorna 'success' mesmo se a consulta à API falhou (nada é
+            # armazenado): essas URLs voltam a ser tentadas após retry_after
+            if result.get('status') == 'success' and result.get('analysis', {}).get('status') == 'success':
+                self.stats_counters['analyzed'] += 1
+                retry_at = float('inf')
+            else:
+                self.stats_counters['errors'] += 1
+                retry_at = time.time() + self.retry_after
+            key = canonicalize_url(url)
+            self._seen.pop(key, None)
+            self._seen[key] = retry_at
+            while len(self._seen) > 10000:
+                self._seen.popitem(last=False)
+
+    def _collect_urls(self):
+        """Extrai URLs novas (canonicalizadas e sem duplicatas) dos feeds"""
+        urls, keys = [], set()
+        current_time = time.time()
+        for feed in self.feeds:
+            for link in self._read_feed(feed):
+                url = self.analyzer.url_canonicalizer.resolve(link)
+                key = canonicalize_url(url)
+                parsed = urlparse(url)
+                domain = (parsed.hostname or '').lower()
+                if (
+                    parsed.scheme not in ('http', 'https')
+                    or self._seen.get(key, 0) > current_time
+                    or key in keys
+                    or key in self.analyzer.result_store
+                    or self.analyzer.domain_health.check(domain, url)
+                ):
+                    self.stats_counters['skipped'] += 1
+                    continue
+                keys.add(key)
+                urls.append(url)
+        return urls
+
+    def _read_feed(self, feed):
+        """Lê um feed de arquivo local ou endpoint HTTP e retorna seus links"""
+        try:
+            if feed.startswith(('http://', 'https://')):
+                response = self.analyzer.transport.get(feed, timeout=self.analyzer.timeout)
+                response.raise_for_status()
+                data = response.content
+            else:
+                with open(feed, 'rb') as feed_file:
+                    data = feed_file.read()
+            root = ElementTree.fromstring(data)
+        except Exception as e:
+            logger.error(f"Erro ao ler feed {feed}: {str(e)}")
+            return []
+
+        links = []
+        for item in root.iter():
+            if item.tag.rsplit('}', 1)[-1] not in ('item', 'entry'):
+                continue
+            for element in item:
+                if element.tag.rsplit('}', 1)[-1] != 'link':
+                    continue
+                # RSS: <link>url</link>; Atom: <link rel="alternate" href="url"/>
+                href = element.get('href') or (element.text or '').strip()
+                if href and element.get('rel', 'alternate') == 'alternate':
+                    links.append(href)
+                    break
+        return links
+
+    def _consume_budget(self):
+        """Controla o número de análises (busca + LLM) por hora"""
+        current_time = time.time()
+        while self._budget_window and current_time - self._budget_window[0] > 3600:
+            self._budget_window.popleft()
+        if len(self._budget_window) >= self.budget:
+            return False
+        self._budget_window.append(current_time)
+        return True
+
+    def stats(self):
+        return dict(self.stats_counters,
+                    enabled=self.enabled,
+                    running=bool(self._thread and self._thread.is_alive()),
+                    budget_used=len(self._budget_window),
+                    budget_per_hour=self.budget)
+
+class LiveTransport:
+    """Transporte HTTP padrão (requisições reais via requests)"""
+
+    mode = 'live'
+
+    def get(self, url, **kwargs):
+        return requests.get(url, **kwargs)
+
+    def post(self, url, **kwargs):
+        return requests.post(url, **kwargs)
+
+    def stats(self):
+        return {'mode': self.mode}
+
+class TransportArchive:
+    """Arquivo compacto (SQLite, corpo comprimido) de respostas indexadas por requisição"""
+
+    # Exceções de rede reproduzidas no modo replay
+    ERRORS = {
+        'timeout': requests.exceptions.Timeout,
+        'connection': requests.exceptions.ConnectionError,
+    }
+
+    def __init__(self, path):
+        self.path = path
+        self._local = threading.local()
+        directory = os.path.dirname(os.path.abspath(path))
+        os.makedirs(directory, exist_ok=True)
+        self._connection().execute(
+            "CREATE TABLE IF NOT EXISTS entries ("
+            " key TEXT PRIMARY KEY,"
+            " method TEXT NOT NULL,"
+            " url TEXT NOT NULL,"
+            " status INTEGER,"
+            " reason TEXT,"
+            " headers TEXT,"
+            " body BLOB,"
+            " final_url TEXT,"
+            " history TEXT,"
+            " error TEXT,"
+            " elapsed REAL NOT NULL,"
+            " recorded_at REAL NOT NULL)"
+        )
+        self._connection().commit()
+        self.close()
+
+    def close(self):
+        """Fecha a conexão da thread atual (reaberta sob demanda)"""
+        connection = getattr(self._local, 'connection', None)
+        if connection is not None and self._local.pid == os.getpid():
+            connection.close()
+        self._local.connection = None
+
+    def _connection(self):
+        # Conexões SQLite não podem ser compartilhadas entre threads nem herdadas
+        # via fork (preload_app do Gunicorn): uma conexão por thread e processo
+        connection = getattr(self._local, 'connection', None)
+        if connection is None or self._local.pid != os.getpid():
+            connection = sqlite3.connect(self.path, timeout=30)
+            self._local.connection = connection
+            self._local.pid = os.getpid()
+        return connection
+
+    @staticmethod
+    def request_key(method, url, payload=None):
+        """Chave determinística da requisição (método, URL e corpo JSON)"""
+        body = json.dumps(payload, sort_keys=True, ensure_ascii=False) if payload is not None else ''
+        return hashlib.sha256(f"{method.upper()} {url}\n{body}".encode('utf-8')).hexdigest()
+
+    def store(self, key, method, url, elapsed, response=None, error=None):
+        """Grava (ou substitui) a resposta ou erro de uma requisição"""
+        if response is not None:
+            values = (
+                response.status_code, response.reason,
+                json.dumps(dict(response.headers)), zlib.compress(response.content),
+                response.url, json.dumps([step.url for step in response.history]), None
+            )
+        else:
+            values = (None, None, None, None, None, None, error)
+
+        connection = self._connection()
+        connection.execute(
+            "INSERT OR REPLACE INTO entries"
+            " (key, method, url, status, reason, headers, body, final_url, history, error, elapsed, recorded_at)"
+            " VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)",
+            (key, method.upper(), url) + values + (elapsed, time.time())
+        )
+        connection.commit()
+
+    def lookup(self, key):
+        """Busca uma entrada pela chave (índice da chave primária) ou None"""
+        return self._connection().execute(
+            "SELECT method, url, status, reason, headers, body, final_url, history, error, elapsed"
+            " FROM entries WHERE key = ?", (key,)
+        ).fetchone()
+
+    def urls(self, method='GET'):
+        """URLs gravadas para um método, na ordem de gravação"""
+        rows = self._connection().execute(
+            "SELECT url FROM entries WHERE method = ? ORDER BY recorded_at", (method.upper(),)
+        )
+        return [row[0] for row in rows]
+
+    def count(self):
+        return self._connection().execute("SELECT COUNT(*) FROM entries").fetchone()[0]
+
+class RecordingTransport(LiveTransport):
+    """Faz requisições reais e grava respostas e erros de rede no arquivo"""
+
+    mode = 'record'
+
+    def __init__(self, archive):
+        self.archive = archive
+
+    def _record(self, method, url, kwargs):
+        key = TransportArchive.request_key(method, url, kwargs.get('json'))
+        start_time = time.monotonic()
+        try:
+            response = getattr(requests, method)(url, **kwargs)
+        except requests.exceptions.Timeout:
+            self.archive.store(key, method, url, time.monotonic() - start_time, error='timeout')
+            raise
+        except requests.exceptions.ConnectionError:
+            self.archive.store(key, method, url, time.monotonic() - start_time, error='connection')
+            raise
+        self.archive.store(key, method, url, time.monotonic() - start_time, response=response)
+        return response
+
+    def get(self, url, **kwargs):
+        return self._record('get', url, kwargs)
+
+    def post(self, url, **kwargs):
+        return self._record('post', url, kwargs)
+
+    def stats(self):
+        return {'mode': self.mode, 'archive': self.archive.path, 'entries': self.archive.count()}
+
+class ReplayMissError(requests.exceptions.RequestException):
+    """Requisição ausente do arquivo de replay (não é uma falha do domínio)"""
+
+class ReplayTransport:
+    """Serve respostas gravadas sem rede, com latência gravada ou configurável"""
+
+    mode = 'replay'
+
+    def __init__(self, archive, latency='recorded'):
+        self.archive = archive
+        self.latency = latency
+        self.hits = 0
+        self.misses = 0
+
+    def _replay(self, method, url, kwargs):
+        entry = self.archive.lookup(TransportArchive.request_key(method, url, kwargs.get('json')))
+        if entry is None:
+            self.misses += 1
+            logger.warning(f"Replay: requisição não gravada: {method.upper()} {url}")
+            raise ReplayMissError(f"Requisição não gravada no arquivo de replay: {url}")
+        self.hits += 1
+
+        _, _, status, reason, headers, body, final_url, history, error, elapsed = entry
+        delay = elapsed if self.latency == 'recorded' else float(self.latency)
+        timeout = kwargs.get('timeout')
+        if isinstance(timeout, (int, float)) and delay > timeout:
+            # Respostas mais lentas que o timeout atual (ex.: adaptativo) expiram como ao vivo
+            time.sleep(timeout)
+            raise requests.exceptions.Timeout(f"Timeout no replay ({timeout:g}s) para {url}")
+        if delay > 0:
+            time.sleep(delay)
+
+        if error:
+            raise TransportArchive.ERRORS.get(error, requests.exceptions.ConnectionError)(
+                f"Erro gravado ({error}) para {url}")
+
+        response = requests.models.Response()
+        response.status_code = status
+        response.reason = reason
+        response.headers = requests.structures.CaseInsensitiveDict(json.loads(headers))
+        response._content = zlib.decompress(body)
+        response.url = final_url
+        response.elapsed = timedelta(seconds=elapsed)
+        response.encoding = requests.utils.get_encoding_from_headers(response.headers)
+        for step_url in json.loads(history):
+            step = requests.models.Response()
+            step.url = step_url
+            step.status_code = 302
+            response.history.append(step)
+        return response
+
+    def get(self, url, **kwargs):
+        return self._replay('get', url, kwargs)
+
+    def post(self, url, **kwargs):
+        return self._replay('post', url, kwargs)
+
+    def stats(self):
+        return {'mode': self.mode, 'archive': self.archive.path, 'hits': self.hits, 'misses': self.misses}
+
+def create_transport():
+    """Cria o transporte HTTP conforme TRANSPORT_MODE (live, record ou replay)"""
+    mode = os.getenv("TRANSPORT_MODE", "live").lower()
+    if mode == 'live':
+        return LiveTransport()
+
+    archive = TransportArchive(os.getenv("TRANSPORT_ARCHIVE", "transport_archive.sqlite3"))
+    if mode == 'record':
+        logger.info(f"Gravando requisições HTTP em {archive.path}")
+        return RecordingTransport(archive)
+    if mode == 'replay':
+        logger.info(f"Reproduzindo requisições HTTP de {archive.path} ({archive.count()} entradas)")
+        return ReplayTransport(archive, latency=os.getenv("REPLAY_LATENCY", "recorded"))
+
+    raise ValueError(f"TRANSPORT_MODE inválido: {mode} (use live, record ou replay)")
 
 class NewsAnalyzer:
     def __init__(self):
         self.api_key = os.getenv("PERPLEXITY_API_KEY")
         self.max_retries = int(os.getenv("MAX_RETRIES", "3"))
         self.timeout = int(os.getenv("TIMEOUT", "30"))
-        
+        self.url_canonicalizer = URLCanonicalizer()
+        self.domain_health = DomainHealthTracker(self.timeout)
+        self.result_store = ResultStore()
+        self.transport = create_transport()
+
         if self.api_key:
             logger.info("Perplexity API configurada")
         else:
@@ -102,11 +1009,19 @@ class NewsAnalyzer:
                     'status': 'error'
                 }
             
-            # Verificar se é um domínio suspeito (lista básica)
-            suspicious_domains = ['bit.ly', 'tinyurl.com', 'shortened.com']
-            if any(domain in parsed_url.netloc.lower() for domain in suspicious_domains):
+            # Verificar se é um encurtador (redirecionamento será registrado em cache)
+            if is_shortener(parsed_url.netloc):
                 logger.warning(f"URL suspeita detectada: {url}")
             
+            # Falhar rápido se o domínio (ou a URL) falhou recentemente; a saúde também
+            # é registrada sob o host enviado (example.com reflete www.example.com)
+            domain = self._host(url)
+            cached_error = self.domain_health.check(domain, url)
+            if cached_error:
+                logger.warning(f"Erro em cache para {domain}, nova tentativa em {cached_error['retry_after']}s")
+                return dict(cached_error, url=url, cached=True)
+            timeout = self.domain_health.timeout_for(domain)
+            
             headers = {
                 'User-Agent': 'Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/91.0.4472.124 Safari/537.36',
                 'Accept': 'text/html,application/xhtml+xml,application/xml;q=0.9,image/webp,*/*;q=0.8',
@@ -117,8 +1032,13 @@ class NewsAnalyzer:
             }
             
             logger.info(f"Extraindo conteúdo de: {url}")
-            response = requests.get(url, headers=headers, timeout=self.timeout, allow_redirects=True)
+            start_time = time.monotonic()
+            response = self.transport.get(url, headers=headers, timeout=timeout, allow_redirects=True)
             response.raise_for_status()
+            # Saúde e latência pertencem ao host que respondeu e ao host enviado
+            latency = time.monotonic() - start_time
+            for host in self._health_hosts(url, response.url or url):
+                self.domain_health.record_success(host, latency)
             
             # Verificar tamanho do conteúdo
             if len(response.content) > 10 * 1024 * 1024:  # 10MB
@@ -128,8 +1048,17 @@ class NewsAnalyzer:
                     'status': 'error'
                 }
             
+            # Registrar o destino de encurtadores para evitar novas idas e voltas
+            final_url = response.url or url
+            if response.history and is_shortener(parsed_url.netloc):
+                self.url_canonicalizer.remember(url, final_url)
+            final_parsed = urlparse(final_url)
+            
             soup = BeautifulSoup(response.content, 'html.parser')
             
+            # Chave canônica: <link rel="canonical"> do mesmo host ou a URL final normalizada
+            canonical_url = self._find_canonical_link(soup, final_url) or canonicalize_url(final_url)
+            
             # Remover scripts, styles, etc.
             for script in soup(["script", "style", "nav", "header", "footer", "aside"]):
                 script.decompose()
@@ -155,8 +1084,7 @@ class NewsAnalyzer:
             
             # Extrair e limpar texto
             text = main_content.get_text() if main_content else ""
-            text = re.sub(r'\s+', ' ', text)
-            text = text.strip()
+            text = ' '.join(text.split())
             
             # Verificar se há conteúdo suficiente
             if len(text) < 100:
@@ -176,31 +1104,48 @@ class NewsAnalyzer:
                 'title': sanitize_input(title_text),
                 'content': sanitize_input(text),
                 'url': url,
-                'domain': parsed_url.netloc,
+                'canonical_url': canonical_url,
+                'domain': final_parsed.netloc or parsed_url.netloc,
                 'status': 'success'
             }
             
-        except requests.exceptions.Timeout:
-            logger.error(f"Timeout ao acessar URL: {url}")
+        except ReplayMissError as e:
+            # Falta de gravação não diz nada sobre a saúde do domínio
             return {
-                'error': f"Timeout ao acessar a URL (limite: {self.timeout}s). Tente novamente.",
+                'error': f"Replay: {str(e)}",
                 'url': url,
                 'status': 'error'
             }
-        except requests.exceptions.ConnectionError:
+        except requests.exceptions.Timeout as e:
+            logger.error(f"Timeout ao acessar URL: {url}")
+            error = {
+                'error': f"Timeout ao acessar a URL (limite: {timeout:g}s). Tente novamente.",
+                'url': url,
+                'status': 'error'
+            }
+            for host in self._health_hosts(url, self._failed_url(e, url)):
+                self.domain_health.record_failure(host, url, error)
+            return error
+        except requests.exceptions.ConnectionError as e:
             logger.error(f"Erro de conexão para URL: {url}")
-            return {
+            error = {
                 'error': "Erro de conexão. Verifique se a URL está acessível.",
                 'url': url,
                 'status': 'error'
             }
+            for host in self._health_hosts(url, self._failed_url(e, url)):
+                self.domain_health.record_failure(host, url, error)
+            return error
         except requests.exceptions.HTTPError as e:
             logger.error(f"Erro HTTP para URL {url}: {e}")
-            return {
+            error = {
                 'error': f"Erro HTTP: {e.response.status_code}. A página pode não existir ou estar indisponível.",
                 'url': url,
                 'status': 'error'
             }
+            for host in self._health_hosts(url, self._failed_url(e, url)):
+                self.domain_health.record_failure(host, url, error, e.response.status_code)
+            return error
         except Exception as e:
             logger.error(f"Erro inesperado ao extrair conteúdo de {url}: {str(e)}")
             return {
@@ -209,6 +1154,46 @@ class NewsAnalyzer:
                 'status': 'error'
             }
     
+    @staticmethod
+    def _host(url):
+        parsed = urlparse(url)
+        return (parsed.hostname or parsed.netloc).lower()
+    
+    @staticmethod
+    def _failed_url(exception, url):
+        """URL da requisição que falhou (o destino, após redirecionamentos)"""
+        request = getattr(exception, 'request', None)
+        response = getattr(exception, 'response', None)
+        return getattr(request, 'url', None) or getattr(response, 'url', None) or url
+    
+    def _health_hosts(self, url, answered_url):
+        """Hosts onde registrar o resultado: o que respondeu e o enviado
+        
+        Encurtadores ficam de fora: um destino fora do ar não bloqueia bit.ly.
+        """
+        hosts = [self._host(answered_url)]
+        submitted_host = self._host(url)
+        if submitted_host not in hosts and not is_shortener(submitted_host):
+            hosts.append(submitted_host)
+        return hosts
+    
+    def _find_canonical_link(self, soup, page_url):
+        """Chave canônica de <link rel="canonical"> se apontar para o mesmo host"""
+        link = soup.find('link', rel=lambda value: value and 'canonical' in (
+            value if isinstance(value, list) else value.split()))
+        if not link or not link.get('href'):
+            return None
+        
+        candidate_url = urljoin(page_url, link['href'].strip())
+        candidate_host = site_host(urlparse(candidate_url).hostname or '')
+        page_host = site_host(urlparse(page_url).hostname or '')
+        
+        # Só o mesmo site (ignorando www./m./mobile./amp.): um subdomínio como evil.blogspot.com
+        # não pode gravar sua análise sob a chave de blogspot.com
+        if not candidate_host or candidate_host != page_host:
+            return None
+        return canonicalize_url(candidate_url)
+    
     def query_perplexity(self, query):
         """Consulta a API Perplexity para verificação com retry e cache básico"""
         if not self.api_key:
@@ -257,7 +1242,7 @@ class NewsAnalyzer:
                 }
                 
                 logger.info(f"Consultando Perplexity API (tentativa {retries + 1}/{self.max_retries})")
-                response = requests.post(
+                response = self.transport.post(
                     "https://api.perplexity.ai/chat/completions",
                     headers=headers,
                     json=payload,
@@ -302,6 +1287,10 @@ class NewsAnalyzer:
                     logger.error(f"Erro HTTP na API Perplexity: {e}")
                     return {'content': f"Erro na API: {e.response.status_code}", 'status': 'error'}
                     
+            except ReplayMissError as e:
+                # Repetir não ajuda: o arquivo de replay não muda entre tentativas
+                return {'content': f"Replay: {str(e)}", 'status': 'error'}
+                    
             except Exception as e:
                 logger.error(f"Erro inesperado na API Perplexity: {str(e)}")
                 retries += 1
@@ -315,6 +1304,16 @@ class NewsAnalyzer:
     def analyze_url(self, url):
         """Analisa uma URL completa com tratamento de erro robusto"""
         try:
+            # Usar o destino em cache de encurtadores; a forma canônica é só a chave
+            url = self.url_canonicalizer.resolve(url)
+            result_key = canonicalize_url(url)
+            
+            # Servir resultado já analisado (interativamente ou pela pré-análise)
+            cached_result = self.result_store.get(result_key)
+            if cached_result:
+                logger.info(f"Resultado em cache para: {result_key}")
+                return cached_result
+            
             # Extrair conteúdo
             content_data = self.extract_content_from_url(url)
             
@@ -345,7 +1344,7 @@ class NewsAnalyzer:
             # Análise adicional de URL
             domain_analysis = self._analyze_domain(content_data['domain'])
             
-            return {
+            result = {
                 'content_data': content_data,
                 'analysis': analysis,
                 'domain_analysis': domain_analysis,
@@ -353,6 +1352,12 @@ class NewsAnalyzer:
                 'timestamp': datetime.now(timezone.utc).isoformat()
             }
             
+            # Guardar apenas análises completas (falhas da API devem ser refeitas)
+            if analysis['status'] == 'success':
+                self.result_store.put(result, 'url', keys={result_key, content_data['canonical_url']})
+            
+            return result
+            
         except Exception as e:
             logger.error(f"Erro inesperado na análise de URL: {str(e)}")
             return {
@@ -362,26 +1367,36 @@ class NewsAnalyzer:
             }
     
     def analyze_text(self, text):
-        """Analisa um texto diretamente com validação melhorada"""
+        """Analisa um texto (str ou NewsDocument já normalizado) com validação melhorada"""
         try:
-            # Validar tamanho do texto
-            if len(text) < 50:
+            # Validar tamanho do texto antes de calcular as métricas do documento
+            length = text.length if isinstance(text, NewsDocument) else len(text)
+            if length < 50:
                 return {
                     'error': "Texto muito curto para análise (mínimo 50 caracteres)",
                     'status': 'error'
                 }
             
-            if len(text) > 20000:
+            if length > 20000:
                 return {
                     'error': "Texto muito longo para análise (máximo 20.000 caracteres)",
                     'status': 'error'
                 }
             
+            document = text if isinstance(text, NewsDocument) else NewsDocument(text)
+            
+            # Servir resultado já analisado para o mesmo texto
+            text_key = 'text:' + document.content_hash
+            cached_result = self.result_store.get(text_key)
+            if cached_result:
+                logger.info("Resultado em cache para o texto")
+                return cached_result
+            
             # Preparar query para verificação
             verification_query = f"""
             Analise este texto de notícia:
             
-            Texto: {text[:1500]}...
+            Texto: {document.text[:1500]}...
             
             Por favor, avalie:
             1. Veracidade das principais afirmações
@@ -397,13 +1412,13 @@ class NewsAnalyzer:
             analysis = self.query_perplexity(verification_query)
             
             # Análise básica do texto
-            text_analysis = self._analyze_text_quality(text)
+            text_analysis = self._analyze_text_quality(document)
             
-            return {
+            result = {
                 'text_data': {
-                    'content': text[:500] + "..." if len(text) > 500 else text,
-                    'length': len(text),
-                    'word_count': len(text.split()),
+                    'content': document.preview(500),
+                    'length': document.length,
+                    'word_count': document.word_count,
                     'quality_score': text_analysis['quality_score']
                 },
                 'analysis': analysis,
@@ -412,6 +1427,11 @@ class NewsAnalyzer:
                 'timestamp': datetime.now(timezone.utc).isoformat()
             }
             
+            if analysis['status'] == 'success':
+                self.result_store.put(result, 'text', keys={text_key})
+            
+            return result
+            
         except Exception as e:
             logger.error(f"Erro inesperado na análise de texto: {str(e)}")
             return {
@@ -461,14 +1481,13 @@ class NewsAnalyzer:
             }
     
     def _analyze_text_quality(self, text):
-        """Análise básica da qualidade do texto"""
+        """Análise básica da qualidade do texto (str ou NewsDocument)"""
         try:
-            words = text.split()
-            sentences = text.split('.')
+            document = text if isinstance(text, NewsDocument) else NewsDocument(text)
             
-            # Métricas básicas
-            avg_word_length = sum(len(word) for word in words) / len(words) if words else 0
-            avg_sentence_length = sum(len(sentence.split()) for sentence in sentences) / len(sentences) if sentences else 0
+            # Métricas básicas (pré-calculadas no documento)
+            avg_word_length = document.word_chars / document.word_count if document.word_count else 0
+            avg_sentence_length = document.sentence_word_total / document.sentence_count if document.sentence_count else 0
             
             # Indicadores de qualidade
             quality_score = 5  # Score neutro
@@ -486,7 +1505,7 @@ class NewsAnalyzer:
                 quality_score += 1
             
             # Detectar excesso de maiúsculas (pode indicar spam/fake news)
-            uppercase_ratio = sum(1 for c in text if c.isupper()) / len(text) if text else 0
+            uppercase_ratio = document.uppercase_count / document.length if document.length else 0
             if uppercase_ratio > 0.1:
                 quality_score -= 2
             
@@ -498,8 +1517,8 @@ class NewsAnalyzer:
                 'avg_word_length': round(avg_word_length, 2),
                 'avg_sentence_length': round(avg_sentence_length, 2),
                 'uppercase_ratio': round(uppercase_ratio * 100, 2),
-                'word_count': len(words),
-                'sentence_count': len([s for s in sentences if s.strip()])
+                'word_count': document.word_count,
+                'sentence_count': document.nonblank_sentence_count
             }
             
         except Exception as e:
@@ -511,6 +1530,37 @@ class NewsAnalyzer:
 
 # Instanciar o analisador
 analyzer = NewsAnalyzer()
+prefetcher = FeedPrefetcher(analyzer)
+
+def start_prefetcher():
+    """Inicia a pré-análise de feeds em apenas um processo (lock de arquivo)"""
+    if not prefetcher.enabled:
+        return False
+    
+    if fcntl is not None:
+        lock_path = os.getenv("PREFETCH_LOCK_FILE",
+                              os.path.join(tempfile.gettempdir(), 'fake-news-prefetch.lock'))
+        try:
+            lock_file = open(lock_path, 'w')
+            fcntl.flock(lock_file, fcntl.LOCK_EX | fcntl.LOCK_NB)
+        except OSError:
+            logger.info("Pré-análise de feeds já em execução em outro processo")
+            return False
+        # Manter o arquivo aberto enquanto o processo viver
+        prefetcher._lock_file = lock_file
+    
+    return prefetcher.start()
+
+@app.before_request
+def track_request_start():
+    with active_requests.get_lock():
+        active_requests.value += 1
+        last_request_started.value = time.time()
+
+@app.teardown_request
+def track_request_end(exception=None):
+    with active_requests.get_lock():
+        active_requests.value = max(0, active_requests.value - 1)
 
 # Adicionar headers de segurança
 @app.after_request
@@ -589,6 +1639,10 @@ def analyze_url():
             return redirect(url_for('index'))
         
         logger.info(f"Análise de URL concluída com sucesso: {parsed.netloc}")
+        
+        # Redirecionar para o permalink (recarregar ou compartilhar não refaz a análise)
+        if result.get('result_id'):
+            return redirect(url_for('result_page', result_id=result['result_id']), code=303)
         return render_template('result.html', result=result, analysis_type='url')
         
     except Exception as e:
@@ -607,7 +1661,7 @@ def analyze_text():
             flash('Por favor, forneça um texto válido', 'error')
             return redirect(url_for('index'))
         
-        # Sanitizar texto
+        # Sanitizar texto (uma única vez; o documento segue até a análise)
         text = sanitize_input(text, max_length=50000)
         
         if len(text) < 50:
@@ -618,15 +1672,20 @@ def analyze_text():
             flash('Texto muito longo. Limite máximo: 20.000 caracteres', 'error')
             return redirect(url_for('index'))
         
-        logger.info(f"Iniciando análise de texto: {len(text)} caracteres")
+        # Métricas calculadas só depois da validação de tamanho
+        document = NewsDocument(text)
+        logger.info(f"Iniciando análise de texto: {document.length} caracteres")
         
-        result = analyzer.analyze_text(text)
+        result = analyzer.analyze_text(document)
         
         if result['status'] == 'error':
             flash(f'Erro na análise: {result.get("error", "Erro desconhecido")}', 'error')
             return redirect(url_for('index'))
         
         logger.info("Análise de texto concluída com sucesso")
+        
+        if result.get('result_id'):
+            return redirect(url_for('result_page', result_id=result['result_id']), code=303)
         return render_template('result.html', result=result, analysis_type='text')
         
     except Exception as e:
@@ -679,12 +1738,15 @@ def api_analyze():
             if len(text) > 20000:
                 return jsonify({'error': 'Texto muito longo (máximo 20.000 caracteres)', 'status': 'error'}), 400
             
-            logger.info(f"API: Iniciando análise de texto: {len(text)} caracteres")
-            result = analyzer.analyze_text(text)
+            document = NewsDocument(text)
+            logger.info(f"API: Iniciando análise de texto: {document.length} caracteres")
+            result = analyzer.analyze_text(document)
         
         # Adicionar timestamp ao resultado
         result['timestamp'] = datetime.now(timezone.utc).isoformat()
         result['request_type'] = 'api'
+        if result.get('result_id'):
+            result['permalink'] = url_for('result_page', result_id=result['result_id'], _external=True)
         
         logger.info(f"API: Análise concluída - status: {result.get('status', 'unknown')}")
         return jsonify(result)
@@ -693,13 +1755,58 @@ def api_analyze():
         logger.error(f'Erro inesperado na API: {str(e)}')
         return jsonify({'error': 'Erro interno do servidor', 'status': 'error'}), 500
 
+def _result_template_mtime():
+    """Data de modificação do template (invalida HTML e ETags após deploy)"""
+    try:
+        return os.path.getmtime(os.path.join(app.root_path, app.template_folder, 'result.html'))
+    except OSError:
+        return 0
+
+def _cacheable(response, result_id):
+    """Adiciona ETag/Cache-Control e responde 304 quando o cliente já tem a versão"""
+    response.set_etag(f"{result_id}-{int(_result_template_mtime())}")
+    response.headers['Cache-Control'] = f'public, max-age={RESULT_HTTP_MAX_AGE}'
+    return response.make_conditional(request)
+
+@app.route('/result/<result_id>')
+def result_page(result_id):
+    """Permalink de um resultado armazenado (HTML renderizado em cache)"""
+    record = analyzer.result_store.load(result_id)
+    if not record:
+        abort(404)
+    
+    html = analyzer.result_store.get_rendered(result_id, min_mtime=_result_template_mtime())
+    if html is None:
+        html = render_template('result.html', result=record['result'],
+                               analysis_type=record['analysis_type'])
+        analyzer.result_store.put_rendered(result_id, html)
+    
+    return _cacheable(app.make_response(html), result_id)
+
+@app.route('/api/result/<result_id>')
+def api_result(result_id):
+    """Resultado armazenado em JSON"""
+    record = analyzer.result_store.load(result_id)
+    if not record:
+        return jsonify({'error': 'Resultado não encontrado', 'status': 'error'}), 404
+    
+    result = dict(record['result'],
+                  analysis_type=record['analysis_type'],
+                  permalink=url_for('result_page', result_id=result_id, _external=True))
+    return _cacheable(jsonify(result), result_id)
+
 @app.route('/status')
 def status():
     """Endpoint de status do sistema"""
     return jsonify({
         'status': 'online',
         'perplexity_api': 'configured' if analyzer.api_key else 'not_configured',
-        'version': '1.0.0'
+        'version': '1.0.0',
+        'redirect_cache': analyzer.url_canonicalizer.stats(),
+        'domain_health': analyzer.domain_health.stats(),
+        'result_store': analyzer.result_store.stats(),
+        'prefetcher': prefetcher.stats(),
+        'transport': analyzer.transport.stats()
     })
 
 if __name__ == '__main__':
@@ -712,4 +1819,9 @@ if __name__ == '__main__':
     print("📱 Acesse: http://localhost:5000")
     print("🔑 Status da API Perplexity:", "🟢 Configurada" if analyzer.api_key else "🔴 Não configurada")
     
+    # Com o reloader do modo debug, só o processo filho (WERKZEUG_RUN_MAIN) atende
+    # requisições; no processo pai o servidor pareceria sempre ocioso
+    if os.environ.get('WERKZEUG_RUN_MAIN') == 'true':
+        start_prefetcher()
+    
     app.run(debug=True, host='0.0.0.0', port=5000)
\ No newline at end of file